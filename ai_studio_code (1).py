@@ -1,12 +1,16 @@
 import os
 import sys
+import copy
+import operator
+import logging
+import functools
+import queue
 import argparse
 import threading
 import uvicorn
 import time
 import signal
-from typing import Optional, Dict, Any
-from rich.pretty import pprint
+from typing import Optional, Dict, Any, Set, Tuple
 
 """
 ai_studio_code.py
@@ -33,8 +37,8 @@ api_server_instance: Optional[uvicorn.Server] = None
 shutdown_event = threading.Event()
 
 
-def signal_handler(signum, frame):
-    """Handle SIGINT/SIGTERM for graceful shutdown.
+def request_shutdown():
+    """Begin graceful shutdown.
     - Set shutdown_event so loops can exit cooperatively
     - Signal uvicorn server to exit
     """
@@ -44,6 +48,54 @@ def signal_handler(signum, frame):
         api_server_instance.should_exit = True
 
 
+def signal_handler(signum, frame):
+    """Handle SIGINT/SIGTERM for graceful shutdown."""
+    request_shutdown()
+
+
+def install_shutdown_handlers() -> None:
+    """Route SIGINT/SIGTERM to request_shutdown().
+    Plain signal.signal handlers only: blocking the signals for a sigwait()
+    thread would leave the mask inherited by every child process (torch or
+    uvicorn workers), making them ignore SIGINT/SIGTERM.
+    """
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+
+_REQUIRED_SECTIONS = ("operational", "system", "environment", "monitoring", "api")
+_REQUIRED_FIELDS = (
+    "system.seed",
+    "system.device",
+    "api.host",
+    "api.port",
+    "operational.log_level",
+)
+_check_required = operator.attrgetter(*_REQUIRED_SECTIONS, *_REQUIRED_FIELDS)
+
+
+_config_cache: Dict[str, Tuple[int, Any]] = {}
+
+
+def load_config_cached(path: Optional[str] = None):
+    """Load config, reusing the parsed object while the file is unchanged.
+    - Keyed on absolute path and st_mtime_ns, so edits invalidate the entry
+    - Returns a deep copy so runtime overrides (e.g. --port) never leak back
+    - Without a path (None or ""), the loader's default file is read uncached
+    The cache is plain module state: it only saves repeat loads within one
+    process, e.g. calling run() more than once. A module reload or a new
+    process starts with an empty cache.
+    """
+    if not path:
+        return load_config()
+    key = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _config_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = _config_cache[key] = (mtime, load_config(path))
+    return copy.deepcopy(cached[1])
+
+
 def validate_config(config) -> bool:
     """Validate minimal structure of config.
     Expected top-level sections: operational, system, environment, monitoring, api
@@ -52,21 +104,17 @@ def validate_config(config) -> bool:
       - api.host, api.port
       - operational.log_level, optional: save_interval
     """
-    required_sections = ["operational", "system", "environment", "monitoring", "api"]
-    for sec in required_sections:
-        if not hasattr(config, sec):
-            raise ValueError(f"Config missing required section: {sec}")
-
-    if not hasattr(config.system, "seed"):
-        raise ValueError("Config missing system.seed")
-    if not hasattr(config.system, "device"):
-        raise ValueError("Config missing system.device")
-
-    if not hasattr(config.api, "host") or not hasattr(config.api, "port"):
-        raise ValueError("Config missing api.host or api.port")
-
-    if not hasattr(config.operational, "log_level"):
-        raise ValueError("Config missing operational.log_level")
+    try:
+        _check_required(config)
+    except AttributeError:
+        # Slow path only on failure: find the first missing entry for the message
+        for path in _REQUIRED_SECTIONS + _REQUIRED_FIELDS:
+            try:
+                operator.attrgetter(path)(config)
+            except AttributeError:
+                kind = "field" if "." in path else "section"
+                raise ValueError(f"Config missing required {kind}: {path}") from None
+        raise
 
     # Provide safe defaults
     if not hasattr(config.operational, "save_interval"):
@@ -75,72 +123,269 @@ def validate_config(config) -> bool:
     return True
 
 
-def start_api_server(host: str, port: int, log_level: str = "error") -> threading.Thread:
-    """Start FastAPI server in a daemon thread and return the thread."""
+def partition_cpus() -> Tuple[Optional[Set[int]], Optional[Set[int]]]:
+    """Split the CPUs available to this process between training and the API.
+    The API thread gets the last CPU and training keeps the rest, so the RL
+    loop is not migrated onto the core serving requests. Returns (None, None)
+    where affinity is unsupported or only one CPU is available.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return None, None
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < 2:
+        return None, None
+    return set(cpus[:-1]), {cpus[-1]}
+
+
+def pin_current_thread(cpus: Optional[Set[int]]) -> None:
+    """Restrict the calling thread to cpus (Linux only; no-op otherwise)."""
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError:
+        pass
+
+
+def renice_current_thread(increment: int) -> bool:
+    """Adjust scheduling priority of the calling thread (Linux nice is per-thread).
+    Returns False where os.nice is unavailable or the change is not permitted,
+    e.g. a negative increment without CAP_SYS_NICE.
+    """
+    if not increment or not hasattr(os, "nice"):
+        return False
+    try:
+        os.nice(increment)
+    except OSError:
+        return False
+    return True
+
+
+def start_api_server(
+    host: str,
+    port: int,
+    log_level: str = "error",
+    cpus: Optional[Set[int]] = None,
+    niceness: int = 0,
+) -> threading.Thread:
+    """Start FastAPI server in a daemon thread and return the thread.
+    If cpus is given, the server thread pins itself to that CPU set first;
+    a positive niceness lowers its priority relative to training.
+    """
     global api_server_instance
     api_config = uvicorn.Config(server.app, host=host, port=port, log_config=None, log_level=log_level)
-    api_server_instance = uvicorn.Server(api_config)
-    api_thread = threading.Thread(target=api_server_instance.run, daemon=True)
+    instance = api_server_instance = uvicorn.Server(api_config)
+
+    def serve():
+        pin_current_thread(cpus)
+        renice_current_thread(niceness)
+        instance.run()
+
+    api_thread = threading.Thread(target=serve, name="api-server", daemon=True)
     api_thread.start()
     return api_thread
 
 
-def run_training_loop(log, env, agent, monitor, save_interval: int):
+def wait_for_api_server(api_thread: threading.Thread, timeout: float = 10.0) -> bool:
+    """Block until uvicorn reports it is serving.
+    Returns False if the server thread died, shutdown was requested, or the
+    timeout elapsed before startup completed.
+    """
+    deadline = time.monotonic() + timeout
+    while not api_server_instance.started:
+        if not api_thread.is_alive() or shutdown_event.is_set() or time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def stop_api_server(api_thread: threading.Thread, timeout: float = 5.0) -> None:
+    """Ask uvicorn to exit and wait for its thread, releasing the port."""
+    global api_server_instance
+    if api_server_instance is not None:
+        api_server_instance.should_exit = True
+    api_thread.join(timeout)
+    api_server_instance = None
+
+
+def make_reset(env, cached: bool = False):
+    """Return the callable used to start each training episode.
+    With cached=True and an env that provides get_state()/set_state(), the
+    first reset's observation and state are kept and restored on later
+    episodes instead of re-running env.reset(). Both are deep-copied on the
+    way in and out, so in-place changes during an episode never reach the
+    snapshot. Envs without that API always use env.reset(). Every episode
+    replays the same initial task, so only enable it for fixed-task envs.
+    """
+    if not (cached and hasattr(env, "get_state") and hasattr(env, "set_state")):
+        return env.reset
+
+    snapshot: Dict[str, Any] = {}
+
+    def reset():
+        if not snapshot:
+            snapshot["obs"] = copy.deepcopy(env.reset())
+            snapshot["state"] = copy.deepcopy(env.get_state())
+        else:
+            env.set_state(copy.deepcopy(snapshot["state"]))
+        return copy.deepcopy(snapshot["obs"])
+
+    return reset
+
+
+class MetricWriter:
+    """Forward monitor.log_metric calls to a background thread.
+    - log_metric() only enqueues, so the training loop never blocks on I/O
+    - flush() waits until every queued metric has been written
+    - close() writes what is queued, then stops the thread
+    """
+
+    _CLOSE = object()
+
+    def __init__(self, log, monitor):
+        self._log = log
+        self._monitor = monitor
+        self._queue: "queue.Queue[Tuple[str, Any, int]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="metric-writer", daemon=True)
+        self._thread.start()
+
+    def log_metric(self, name: str, value: Any, step: int) -> None:
+        self._queue.put((name, value, step))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for queued metrics to be written.
+        Returns False if the writer thread died or the timeout elapsed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = self._queue.all_tasks_done
+        with done:
+            while self._queue.unfinished_tasks:
+                if not self._thread.is_alive():
+                    return False
+                wait = 0.1
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                done.wait(wait)
+        return True
+
+    def close(self) -> None:
+        self._queue.put(self._CLOSE)
+        self._thread.join()
+
+    def _run(self) -> None:
+        get = self._queue.get
+        while True:
+            item = get()
+            if item is self._CLOSE:
+                self._queue.task_done()
+                return
+            name, value, step = item
+            try:
+                self._monitor.log_metric(name, value, step)
+            except Exception as e:
+                self._log.warning(f"Failed to log metric {name}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+def run_training_loop(
+    log,
+    env,
+    agent,
+    monitor,
+    save_interval: int,
+    cpus: Optional[Set[int]] = None,
+    cached_reset: bool = False,
+):
     log.info("[bold magenta]Starting training loop...[/bold magenta]")
+    debug_enabled = log.isEnabledFor(logging.DEBUG)
+    # Bind hot-loop methods once; avoids attribute lookups on every step
+    is_set = shutdown_event.is_set
+    act = agent.act
+    env_step = env.step
+    learn = agent.learn
+    reset = make_reset(env, cached_reset)
+    metrics = MetricWriter(log, monitor)
     episode = 0
-    while not shutdown_event.is_set():
-        try:
-            episode += 1
-            log.info("\n" + "=" * 60)
-            log.info(f"[bold]Episode {episode}[/bold]")
-            log.info("=" * 60)
-
-            obs = env.reset()
-            done = False
-            total_reward = 0
-            step = 0
-
-            while not done and not shutdown_event.is_set():
-                step += 1
-                action = agent.act(obs)
-                next_obs, reward, done, info = env.step(action)
-                agent.learn(obs, action, reward, next_obs, done)
-                total_reward += reward
-                obs = next_obs
-                if step % 100 == 0:
-                    log.debug(f"Step {step}: reward={reward:.4f}")
-
-            log.info(f"Episode {episode} finished: total_reward={total_reward:.4f}, steps={step}")
-            monitor.log_metric("episode_reward", total_reward, episode)
-            monitor.log_metric("episode_length", step, episode)
-
-            if episode % save_interval == 0:
-                log.info("[bold cyan]Saving checkpoint...[/bold cyan]")
-                agent.save_weights()
-                monitor.save_metrics()
-
-        except KeyboardInterrupt:
-            log.info("\n[yellow]Training interrupted by user[/yellow]")
-            break
-        except Exception as e:
-            log.error(f"[bold red]Error in training loop: {e}[/bold red]")
-            log.exception(e)
-            continue
-
+    # The loop runs on the caller's thread; undo name, pinning and priority when it returns
+    thread = threading.current_thread()
+    original_name = thread.name
+    original_cpus = os.sched_getaffinity(0) if cpus and hasattr(os, "sched_getaffinity") else None
+    reniced = False
+    try:
+        # Python-level name only (log records, py-spy); the OS thread name is unchanged
+        thread.name = "rl-train"
+        pin_current_thread(cpus)
+        reniced = renice_current_thread(-5)
+        if not reniced:
+            log.debug("Could not raise training thread priority; relying on API thread niceness")
+        while not is_set():
+            try:
+                episode += 1
+                log.info("\n" + "=" * 60)
+                log.info(f"[bold]Episode {episode}[/bold]")
+                log.info("=" * 60)
+
+                obs = reset()
+                done = False
+                total_reward = 0
+                step = 0
+
+                while not done and not is_set():
+                    step += 1
+                    action = act(obs)
+                    next_obs, reward, done, info = env_step(action)
+                    learn(obs, action, reward, next_obs, done)
+                    total_reward += reward
+                    obs = next_obs
+                    if debug_enabled and (step & 127) == 0:
+                        log.debug("Step %d: reward=%.4f", step, reward)
+
+                log.info(f"Episode {episode} finished: total_reward={total_reward:.4f}, steps={step}")
+                metrics.log_metric("episode_reward", total_reward, episode)
+                metrics.log_metric("episode_length", step, episode)
+
+                if episode % save_interval == 0:
+                    log.info("[bold cyan]Saving checkpoint...[/bold cyan]")
+                    agent.save_weights()
+                    if not metrics.flush():
+                        log.warning("[bold yellow]Metric writer stopped; saved metrics may be incomplete[/bold yellow]")
+                    monitor.save_metrics()
+
+            except KeyboardInterrupt:
+                log.info("\n[yellow]Training interrupted by user[/yellow]")
+                break
+            except Exception as e:
+                log.error(f"[bold red]Error in training loop: {e}[/bold red]")
+                log.exception(e)
+                continue
+    finally:
+        # Make sure run() saves every metric logged so far
+        metrics.close()
+        if reniced:
+            renice_current_thread(5)
+        pin_current_thread(original_cpus)
+        thread.name = original_name
     log.info("[bold green]Training loop exiting.[/bold green]")
 
 
 def run_eval_loop(log, env, agent):
     log.info("[bold magenta]Starting evaluation loop...[/bold magenta]")
     try:
+        is_set = shutdown_event.is_set
+        act = functools.partial(agent.act, deterministic=True) if hasattr(agent, "act") else agent.predict
+        env_step = env.step
         obs = env.reset()
         done = False
         total_reward = 0
         step = 0
-        while not done and not shutdown_event.is_set():
+        while not done and not is_set():
             step += 1
-            action = agent.act(obs, deterministic=True) if hasattr(agent, "act") else agent.predict(obs)
-            obs, reward, done, info = env.step(action)
+            action = act(obs)
+            obs, reward, done, info = env_step(action)
             total_reward += reward
         log.info(f"[bold green]Eval completed: total_reward={total_reward:.4f}, steps={step}[/bold green]")
     except Exception as e:
@@ -148,87 +393,113 @@ def run_eval_loop(log, env, agent):
         log.exception(e)
 
 
+RUN_MODES = ("server", "train", "eval")
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="EFCA-ADAPT-AG Runner")
-    parser.add_argument("--mode", choices=["server", "train", "eval"], default="server", help="Run mode")
+    parser.add_argument("--mode", choices=RUN_MODES, default="server", help="Run mode")
     parser.add_argument("--config", type=str, default=None, help="Path to YAML config file")
     parser.add_argument("--port", type=int, default=None, help="Override API port")
     return parser.parse_args()
 
 
-def main():
-    global api_server_instance
+def launch_api(log, api_config, **kwargs) -> threading.Thread:
+    """Start the API server thread and log once it is serving."""
+    api_thread = start_api_server(api_config.host, api_config.port, **kwargs)
+    if wait_for_api_server(api_thread):
+        log.info(f"[bold green]API Server running at http://{api_config.host}:{api_config.port}[/bold green]")
+    else:
+        log.warning("[bold yellow]API Server did not report startup[/bold yellow]")
+    return api_thread
 
-    # Register signal handlers for graceful shutdown
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
 
+def run(mode: str = "server", config_path: Optional[str] = None, port: Optional[int] = None) -> None:
+    """Initialize the system and run it in the given mode.
+    - mode: one of RUN_MODES
+    - config_path: YAML config file; None uses the loader's default
+    - port: override for the API port (server mode)
+    Shutdown is driven by shutdown_event; main() wires it to SIGINT/SIGTERM.
+    Safe to call again after it returns: the event is cleared on entry and
+    the API server is stopped before returning.
+    """
+    if mode not in RUN_MODES:
+        raise ValueError(f"Unknown run mode: {mode}")
+    shutdown_event.clear()
+
+    print("[INFO] Loading configuration...")
+    config = load_config_cached(config_path)
+    validate_config(config)
+
+    # Initialize logger early; ensure consistent formatting and levels
+    log = setup_logger(getattr(config.operational, "log_level", "INFO"))
+    log.info("[bold green]Initializing EFCA-ADAPT System...[/bold green]")
     try:
-        args = parse_args()
-        print("[INFO] Loading configuration...")
-        config = load_config(args.config) if args.config else load_config()
-        validate_config(config)
+        # If config object supports .dict() (pydantic), pretty print it at DEBUG only;
+        # rich's recursive formatting is too slow to pay on every startup
+        cfg_dict: Dict[str, Any] = config.dict() if hasattr(config, "dict") else vars(config)
+        if log.isEnabledFor(logging.DEBUG):
+            from rich.pretty import pprint
 
-        # Initialize logger early; ensure consistent formatting and levels
-        log = setup_logger(getattr(config.operational, "log_level", "INFO"))
-        log.info("[bold green]Initializing EFCA-ADAPT System...[/bold green]")
-        try:
-            # If config object supports .dict() (pydantic), pretty print it
-            cfg_dict: Dict[str, Any] = config.dict() if hasattr(config, "dict") else vars(config)
             pprint(cfg_dict)
-        except Exception:
-            pass
-
-        # Reproducibility and device
-        set_seed(config.system.seed)
-        device = get_device(config.system.device)
-        log.info(f"Using device: [bold cyan]{device}[/bold cyan]")
-
-        # Construct environment, agent, monitoring
-        log.info("Setting up environment and agent...")
-        env = MetaRLToyEnv(config.environment)
-        agent = MetaAgent(config, env.obs_dim, env.action_dim)
-        monitor = MLOpsMonitor(config.monitoring)
-        server.set_agent_instance(agent)
-
-        # Load weights if available
-        try:
-            agent.load_weights()
-            log.info("[bold green]Successfully loaded agent weights[/bold green]")
-        except FileNotFoundError:
-            log.warning("[bold yellow]No saved weights found. Starting from scratch.[/bold yellow]")
-        except Exception as e:
-            log.warning(f"[bold yellow]Could not load weights: {e}[/bold yellow]")
+        else:
+            log.info("Config loaded: %d sections", len(cfg_dict))
+    except Exception:
+        pass
+
+    # Reproducibility and device
+    set_seed(config.system.seed)
+    device = get_device(config.system.device)
+    log.info(f"Using device: [bold cyan]{device}[/bold cyan]")
+
+    # Construct environment, agent, monitoring
+    log.info("Setting up environment and agent...")
+    env = MetaRLToyEnv(config.environment)
+    agent = MetaAgent(config, env.obs_dim, env.action_dim)
+    monitor = MLOpsMonitor(config.monitoring)
+    server.set_agent_instance(agent)
+
+    # Load weights if available
+    try:
+        agent.load_weights()
+        log.info("[bold green]Successfully loaded agent weights[/bold green]")
+    except FileNotFoundError:
+        log.warning("[bold yellow]No saved weights found. Starting from scratch.[/bold yellow]")
+    except Exception as e:
+        log.warning(f"[bold yellow]Could not load weights: {e}[/bold yellow]")
 
+    api_thread: Optional[threading.Thread] = None
+    try:
         # Branch by mode
-        mode = args.mode
         if mode == "server":
             # Start API only
             log.info("Starting API server...")
-            if args.port is not None:
-                config.api.port = args.port
-            api_thread = start_api_server(config.api.host, config.api.port)
-            time.sleep(1.5)
-            log.info(f"[bold green]API Server running at http://{config.api.host}:{config.api.port}[/bold green]")
+            if port is not None:
+                config.api.port = port
+            api_thread = launch_api(log, config.api)
 
             # Wait until shutdown
-            while not shutdown_event.is_set():
-                time.sleep(0.5)
+            shutdown_event.wait()
 
         elif mode == "train":
             # Start API in background for monitoring while training
             log.info("Starting background API server for training mode...")
-            api_thread = start_api_server(config.api.host, config.api.port)
-            time.sleep(1.5)
-            log.info(f"[bold green]API Server running at http://{config.api.host}:{config.api.port}[/bold green]")
-            run_training_loop(log, env, agent, monitor, save_interval=config.operational.save_interval)
+            train_cpus, api_cpus = partition_cpus()
+            api_thread = launch_api(log, config.api, cpus=api_cpus, niceness=5)
+            run_training_loop(
+                log,
+                env,
+                agent,
+                monitor,
+                save_interval=config.operational.save_interval,
+                cpus=train_cpus,
+                cached_reset=getattr(config.environment, "cached_reset", False),
+            )
 
         elif mode == "eval":
             # Optional: start API for live inspection during eval
             log.info("Starting background API server for eval mode (optional)...")
-            api_thread = start_api_server(config.api.host, config.api.port)
-            time.sleep(1.5)
-            log.info(f"[bold green]API Server running at http://{config.api.host}:{config.api.port}[/bold green]")
+            api_thread = launch_api(log, config.api)
             run_eval_loop(log, env, agent)
 
         # On exit paths, persist state
@@ -238,9 +509,20 @@ def main():
             monitor.save_metrics()
         except Exception as e:
             log.warning(f"During shutdown, save failed: {e}")
+    finally:
+        if api_thread is not None:
+            stop_api_server(api_thread)
+
+    log.info("[bold green]Shutdown complete.[/bold green]")
 
-        log.info("[bold green]Shutdown complete.[/bold green]")
 
+def main():
+    # Register signal handlers for graceful shutdown (before any thread starts)
+    install_shutdown_handlers()
+
+    try:
+        args = parse_args()
+        run(args.mode, args.config, args.port)
     except Exception as e:
         print(f"[FATAL ERROR] System initialization failed: {e}")
         import traceback
@@ -0,0 +1,24 @@
+import pytest
+from types import SimpleNamespace
+
+
+@pytest.fixture(scope="session")
+def efca_modules():
+    # Import once per session; skip every dependent test if unavailable
+    try:
+        from efca_adapt.adapt_platform.environment import MetaRLToyEnv
+        from efca_adapt.agent.meta_agent import MetaAgent
+    except Exception as e:
+        pytest.skip(f"Dependencies not available: {e}")
+    return SimpleNamespace(MetaRLToyEnv=MetaRLToyEnv, MetaAgent=MetaAgent)
+
+
+@pytest.fixture(scope="module")
+def smoke_cfg():
+    return SimpleNamespace(
+        environment=SimpleNamespace(),
+        system=SimpleNamespace(seed=42, device="cpu"),
+        operational=SimpleNamespace(log_level="INFO"),
+        api=SimpleNamespace(host="127.0.0.1", port=8000),
+        monitoring=SimpleNamespace(),
+    )
@@ -10,25 +10,10 @@ def test_imports():
         pytest.skip(f"efca_adapt package not present: {e}")
 
 
-def test_env_and_agent_smoke(monkeypatch):
+def test_env_and_agent_smoke(efca_modules, smoke_cfg):
     # Minimal smoke test to instantiate environment and agent if available
-    try:
-        from efca_adapt.adapt_platform.environment import MetaRLToyEnv
-        from efca_adapt.agent.meta_agent import MetaAgent
-        from types import SimpleNamespace
-    except Exception as e:
-        pytest.skip(f"Dependencies not available: {e}")
-
-    cfg = SimpleNamespace(
-        environment=SimpleNamespace(),
-        system=SimpleNamespace(seed=42, device="cpu"),
-        operational=SimpleNamespace(log_level="INFO"),
-        api=SimpleNamespace(host="127.0.0.1", port=8000),
-        monitoring=SimpleNamespace(),
-    )
-
-    env = MetaRLToyEnv(cfg.environment)
-    agent = MetaAgent(cfg, env.obs_dim, env.action_dim)
+    env = efca_modules.MetaRLToyEnv(smoke_cfg.environment)
+    agent = efca_modules.MetaAgent(smoke_cfg, env.obs_dim, env.action_dim)
 
     obs = env.reset()
     action = agent.act(obs)
@@ -0,0 +1,423 @@
+import importlib.util
+import os
+import signal
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+RUNNER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai_studio_code (1).py")
+
+STUB_MODULES = (
+    "efca_adapt",
+    "efca_adapt.utils",
+    "efca_adapt.utils.config_loader",
+    "efca_adapt.utils.torch_utils",
+    "efca_adapt.infra",
+    "efca_adapt.infra.logger",
+    "efca_adapt.infra.monitoring",
+    "efca_adapt.agent",
+    "efca_adapt.agent.meta_agent",
+    "efca_adapt.adapt_platform",
+    "efca_adapt.adapt_platform.environment",
+    "efca_adapt.api",
+)
+
+
+class StubLog:
+    def __init__(self):
+        self.records = []
+
+    def _record(self, level):
+        return lambda msg, *args: self.records.append((level, msg % args if args else msg))
+
+    def __getattr__(self, level):
+        if level in ("debug", "info", "warning", "error", "exception"):
+            return self._record(level)
+        raise AttributeError(level)
+
+    def isEnabledFor(self, level):
+        return False
+
+
+class RecordingMonitor:
+    def __init__(self, fail_on=()):
+        self.logged = []
+        self.fail_on = set(fail_on)
+
+    def log_metric(self, name, value, step):
+        if name in self.fail_on:
+            raise RuntimeError(f"cannot log {name}")
+        self.logged.append((name, value, step))
+
+    def save_metrics(self):
+        pass
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    # Load the runner script with the efca_adapt package replaced by empty stubs
+    pytest.importorskip("uvicorn")
+    for name in STUB_MODULES:
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    stubs = {name: sys.modules[name] for name in STUB_MODULES}
+    stubs["efca_adapt.utils.config_loader"].load_config = lambda path=None: None
+    stubs["efca_adapt.infra.logger"].setup_logger = lambda level="INFO": StubLog()
+    stubs["efca_adapt.utils.torch_utils"].get_device = lambda device: device
+    stubs["efca_adapt.utils.torch_utils"].set_seed = lambda seed: None
+    stubs["efca_adapt.agent.meta_agent"].MetaAgent = object
+    stubs["efca_adapt.adapt_platform.environment"].MetaRLToyEnv = object
+    stubs["efca_adapt.infra.monitoring"].MLOpsMonitor = object
+    stubs["efca_adapt.api"].server = types.SimpleNamespace(app=None, set_agent_instance=lambda agent: None)
+
+    spec = importlib.util.spec_from_file_location("efca_runner", RUNNER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_metric_writer_flush_writes_in_order(runner):
+    monitor = RecordingMonitor()
+    writer = runner.MetricWriter(StubLog(), monitor)
+    expected = [("episode_reward", float(i), i) for i in range(100)]
+    for entry in expected:
+        writer.log_metric(*entry)
+    writer.flush()
+    assert monitor.logged == expected
+    writer.close()
+
+
+def test_metric_writer_swallows_monitor_errors(runner):
+    log = StubLog()
+    monitor = RecordingMonitor(fail_on={"broken"})
+    writer = runner.MetricWriter(log, monitor)
+    writer.log_metric("episode_reward", 1.0, 1)
+    writer.log_metric("broken", 0.0, 1)
+    writer.log_metric("episode_length", 10, 1)
+    writer.close()
+
+    assert monitor.logged == [("episode_reward", 1.0, 1), ("episode_length", 10, 1)]
+    assert any(level == "warning" and "broken" in msg for level, msg in log.records)
+    assert not writer._thread.is_alive()
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_metric_writer_flush_reports_dead_writer(runner):
+    class RaisingLog(StubLog):
+        def warning(self, msg, *args):
+            raise RuntimeError("log handler broke")
+
+    writer = runner.MetricWriter(RaisingLog(), RecordingMonitor(fail_on={"broken"}))
+    writer.log_metric("broken", 0.0, 1)
+    writer.log_metric("episode_reward", 1.0, 1)
+    start = time.monotonic()
+    assert not writer.flush()
+    assert time.monotonic() - start < 2.0
+    writer.close()
+
+
+def test_metric_writer_flush_times_out(runner):
+    release = threading.Event()
+
+    class BlockingMonitor(RecordingMonitor):
+        def log_metric(self, name, value, step):
+            release.wait()
+            super().log_metric(name, value, step)
+
+    writer = runner.MetricWriter(StubLog(), BlockingMonitor())
+    writer.log_metric("episode_reward", 1.0, 1)
+    assert not writer.flush(timeout=0.05)
+    release.set()
+    assert writer.flush(timeout=2.0)
+    writer.close()
+
+
+def test_load_config_cached_reuses_parse_until_file_changes(runner, tmp_path, monkeypatch):
+    calls = []
+
+    def fake_load_config(path=None):
+        calls.append(path)
+        return types.SimpleNamespace(api=types.SimpleNamespace(port=8000))
+
+    monkeypatch.setattr(runner, "load_config", fake_load_config)
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("api: {}\n")
+
+    first = runner.load_config_cached(str(config_file))
+    first.api.port = 9000
+    second = runner.load_config_cached(str(config_file))
+    assert calls == [str(config_file)]
+    assert second.api.port == 8000
+
+    os.utime(config_file, ns=(0, 0))
+    runner.load_config_cached(str(config_file))
+    assert len(calls) == 2
+
+    runner.load_config_cached("")
+    assert calls[-1] is None
+
+
+@pytest.mark.skipif(not hasattr(signal, "pthread_sigmask"), reason="POSIX signal masks only")
+def test_shutdown_handlers_set_event_without_blocking_signals(runner):
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        runner.install_shutdown_handlers()
+        # Child processes inherit this mask, so it must stay empty
+        assert not signal.pthread_sigmask(signal.SIG_BLOCK, [])
+
+        os.kill(os.getpid(), signal.SIGTERM)
+        assert runner.shutdown_event.wait(5)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+def start_idle_thread(stop):
+    thread = threading.Thread(target=stop.wait, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_wait_for_api_server_returns_once_started(runner):
+    stop = threading.Event()
+    runner.api_server_instance = types.SimpleNamespace(started=True)
+    try:
+        assert runner.wait_for_api_server(start_idle_thread(stop), timeout=1.0)
+    finally:
+        stop.set()
+
+
+def test_wait_for_api_server_gives_up_on_dead_thread(runner):
+    runner.api_server_instance = types.SimpleNamespace(started=False)
+    dead = threading.Thread(target=lambda: None)
+    dead.start()
+    dead.join()
+    start = time.monotonic()
+    assert not runner.wait_for_api_server(dead, timeout=5.0)
+    assert time.monotonic() - start < 1.0
+
+
+def test_wait_for_api_server_times_out(runner):
+    stop = threading.Event()
+    runner.api_server_instance = types.SimpleNamespace(started=False)
+    try:
+        start = time.monotonic()
+        assert not runner.wait_for_api_server(start_idle_thread(stop), timeout=0.05)
+        assert time.monotonic() - start < 1.0
+    finally:
+        stop.set()
+
+
+def test_wait_for_api_server_stops_on_shutdown(runner):
+    stop = threading.Event()
+    runner.api_server_instance = types.SimpleNamespace(started=False)
+    runner.shutdown_event.set()
+    try:
+        assert not runner.wait_for_api_server(start_idle_thread(stop), timeout=5.0)
+    finally:
+        stop.set()
+
+
+def test_partition_cpus_single_cpu(runner, monkeypatch):
+    monkeypatch.setattr(runner.os, "sched_getaffinity", lambda pid: {0}, raising=False)
+    assert runner.partition_cpus() == (None, None)
+
+
+def test_partition_cpus_reserves_last_cpu_for_api(runner, monkeypatch):
+    monkeypatch.setattr(runner.os, "sched_getaffinity", lambda pid: {3, 0, 5, 1}, raising=False)
+    assert runner.partition_cpus() == ({0, 1, 3}, {5})
+
+
+def test_partition_cpus_without_affinity_support(runner, monkeypatch):
+    monkeypatch.delattr(runner.os, "sched_getaffinity", raising=False)
+    assert runner.partition_cpus() == (None, None)
+
+
+class OneStepEnv:
+    obs_dim = 1
+    action_dim = 1
+
+    def reset(self):
+        return 0.0
+
+    def step(self, action):
+        return 0.0, 1.0, True, {}
+
+
+class StopAfterAgent:
+    def __init__(self, shutdown_event, episodes=2):
+        self.shutdown_event = shutdown_event
+        self.remaining = episodes
+
+    def act(self, obs):
+        return 0
+
+    def learn(self, *transition):
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.shutdown_event.set()
+
+    def save_weights(self):
+        pass
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="Linux CPU affinity only")
+def test_training_loop_restores_caller_affinity(runner):
+    original = os.sched_getaffinity(0)
+    if len(original) < 2:
+        pytest.skip("needs at least two CPUs")
+    train_cpus = {min(original)}
+    seen = []
+
+    class RecordingEnv(OneStepEnv):
+        def step(self, action):
+            seen.append(os.sched_getaffinity(0))
+            return super().step(action)
+
+    agent = StopAfterAgent(runner.shutdown_event)
+    runner.run_training_loop(StubLog(), RecordingEnv(), agent, RecordingMonitor(), save_interval=10, cpus=train_cpus)
+
+    assert seen and all(cpus == train_cpus for cpus in seen)
+    assert os.sched_getaffinity(0) == original
+
+
+def test_training_loop_restores_thread_name_and_priority(runner):
+    seen = []
+
+    class RecordingEnv(OneStepEnv):
+        def step(self, action):
+            seen.append(threading.current_thread().name)
+            return super().step(action)
+
+    original_name = threading.current_thread().name
+    original_nice = os.nice(0) if hasattr(os, "nice") else None
+    agent = StopAfterAgent(runner.shutdown_event)
+    runner.run_training_loop(StubLog(), RecordingEnv(), agent, RecordingMonitor(), save_interval=10)
+
+    assert seen and all(name == "rl-train" for name in seen)
+    assert threading.current_thread().name == original_name
+    if original_nice is not None:
+        assert os.nice(0) == original_nice
+
+
+class CountingEnv:
+    def __init__(self):
+        self.resets = 0
+        self.pos = [0.0, 0.0]
+
+    def reset(self):
+        self.resets += 1
+        self.pos[:] = [0.0, 0.0]
+        return ([0.0, 0.0], {"task": [1.0]})
+
+    def step(self, action):
+        for i in range(len(self.pos)):
+            self.pos[i] += action
+
+
+class StatefulEnv(CountingEnv):
+    def get_state(self):
+        # Returns live internal state, as many envs do
+        return self.pos
+
+    def set_state(self, state):
+        self.pos = state
+
+
+def test_make_reset_uncached_is_env_reset(runner):
+    env = StatefulEnv()
+    assert runner.make_reset(env, cached=False) == env.reset
+
+
+def test_make_reset_needs_state_api(runner):
+    env = CountingEnv()
+    assert runner.make_reset(env, cached=True) == env.reset
+
+
+def test_make_reset_cached_restores_snapshot(runner):
+    env = StatefulEnv()
+    reset = runner.make_reset(env, cached=True)
+
+    obs, info = reset()
+    env.step(5.0)
+    obs[0] = 5.0
+    info["task"][0] = 5.0
+
+    obs, info = reset()
+    assert obs == [0.0, 0.0]
+    assert info == {"task": [1.0]}
+    assert env.resets == 1
+    assert env.pos == [0.0, 0.0]
+
+    # The restored state is a copy too, so this episode cannot corrupt the next
+    env.step(3.0)
+    reset()
+    assert env.pos == [0.0, 0.0]
+
+
+@pytest.fixture
+def stub_system(runner, monkeypatch):
+    # Wire run() to one-step stubs and a fake API server that serves until told to exit
+    state = types.SimpleNamespace(config_loads=0, agents=[], servers=[])
+
+    def fake_load_config(path=None):
+        state.config_loads += 1
+        return types.SimpleNamespace(
+            environment=types.SimpleNamespace(),
+            system=types.SimpleNamespace(seed=0, device="cpu"),
+            operational=types.SimpleNamespace(log_level="INFO"),
+            api=types.SimpleNamespace(host="127.0.0.1", port=8000),
+            monitoring=types.SimpleNamespace(),
+        )
+
+    class Agent(StopAfterAgent):
+        def __init__(self, config, obs_dim, action_dim):
+            super().__init__(runner.shutdown_event)
+            state.agents.append(self)
+
+        def load_weights(self):
+            raise FileNotFoundError
+
+    def fake_start_api_server(host, port, **kwargs):
+        instance = types.SimpleNamespace(started=True, should_exit=False)
+        runner.api_server_instance = instance
+
+        def serve():
+            while not instance.should_exit:
+                time.sleep(0.005)
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        state.servers.append(thread)
+        return thread
+
+    monkeypatch.setattr(runner, "load_config", fake_load_config)
+    monkeypatch.setattr(runner, "MetaRLToyEnv", lambda cfg: OneStepEnv())
+    monkeypatch.setattr(runner, "MetaAgent", Agent)
+    monkeypatch.setattr(runner, "MLOpsMonitor", lambda cfg: RecordingMonitor())
+    monkeypatch.setattr(runner, "start_api_server", fake_start_api_server)
+    return state
+
+
+def test_run_can_be_called_again(runner, stub_system):
+    runner.run("train")
+    runner.run("train")
+
+    # Both runs trained to their stop condition instead of exiting on a stale event
+    assert [agent.remaining for agent in stub_system.agents] == [0, 0]
+    assert len(stub_system.servers) == 2
+    assert not any(thread.is_alive() for thread in stub_system.servers)
+    assert runner.api_server_instance is None
+
+
+def test_run_reuses_cached_config(runner, stub_system, tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("api: {}\n")
+
+    runner.run("train", str(config_file))
+    runner.run("train", str(config_file))
+
+    assert stub_system.config_loads == 1
+    assert [agent.remaining for agent in stub_system.agents] == [0, 0]